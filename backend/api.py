@@ -3,14 +3,24 @@ Flask API Server for AI-Pacman Demo
 Exposes reinforcement learning agents and game functionality
 """
 
+import base64
+import functools
 import sys
 import os
 import json
+import multiprocessing
 import random
 import threading
 import time
-from flask import Flask, jsonify, request
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import orjson
+from flask import Flask, jsonify, request, Response
 from flask_cors import CORS
+from flask_orjson import OrjsonProvider
 
 # Import game modules
 import layout
@@ -18,6 +28,7 @@ import pacman
 import game
 import gridworld
 import util
+import fast_mdp
 from valueIterationAgents import ValueIterationAgent
 from qlearningAgents import QLearningAgent, PacmanQAgent, ApproximateQAgent
 from learningAgents import ValueEstimationAgent, ReinforcementAgent
@@ -26,31 +37,103 @@ import textDisplay
 import ghostAgents
 
 app = Flask(__name__)
+# Encode all jsonify() responses with orjson instead of the stdlib json
+# module; the walls/food matrices and Q-value tables returned by the
+# training endpoints are large enough that encoding dominates latency.
+# OPT_SERIALIZE_NUMPY handles the numpy scalars agents return from getValue.
+app.json = OrjsonProvider(app)
+app.json.option = orjson.OPT_NAIVE_UTC | orjson.OPT_SERIALIZE_NUMPY
 CORS(app)
 
-# Store active training sessions
+# Store active training sessions (job id -> Future)
 training_sessions = {}
 session_lock = threading.Lock()
+EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count())
 
 
-def get_available_layouts():
-    """Get list of available layout files"""
-    layouts_dir = os.path.join(os.path.dirname(__file__), 'layouts')
+LAYOUTS_DIR = os.path.join(os.path.dirname(__file__), 'layouts')
+
+
+@functools.lru_cache(maxsize=1)
+def _list_layouts(dir_mtime):
+    """Scan the layouts directory; dir_mtime keys the cache so the listing
+    refreshes whenever a layout file is added or removed."""
     layouts = []
-    if os.path.exists(layouts_dir):
-        for f in os.listdir(layouts_dir):
+    if os.path.exists(LAYOUTS_DIR):
+        for f in os.listdir(LAYOUTS_DIR):
             if f.endswith('.lay'):
                 layouts.append(f.replace('.lay', ''))
     return sorted(layouts)
 
 
+def get_available_layouts():
+    """Get list of available layout files (cached until the directory changes)"""
+    try:
+        dir_mtime = os.path.getmtime(LAYOUTS_DIR)
+    except OSError:
+        dir_mtime = 0.0
+    return _list_layouts(dir_mtime)
+
+
 def get_gridworld_grids():
     """Get available gridworld configurations"""
     return ['BookGrid', 'BridgeGrid', 'CliffGrid', 'MazeGrid', 'DiscountGrid']
 
 
+def _grid_to_list(grid):
+    """Convert a boolean game.Grid to a nested [x][y] list of bools.
+
+    Grid stores its cells as a list of W columns, so np.asarray does the
+    whole W*H conversion in C instead of a Python double comprehension.
+    """
+    if hasattr(grid, 'data'):
+        return np.asarray(grid.data, dtype=bool).tolist()
+    return [[grid[x][y] for y in range(grid.height)] for x in range(grid.width)]
+
+
+def _layout_walls_list(lay):
+    """Serialize layout walls once and cache on the layout; walls never change."""
+    walls = getattr(lay, '_wallsList', None)
+    if walls is None:
+        walls = lay._wallsList = _grid_to_list(lay.walls)
+    return walls
+
+
+def _pack_grid(g):
+    """Bit-pack a boolean game.Grid into {'w', 'h', 'bits'}.
+
+    bits is base64(np.packbits(...)) over the cells in [x][y] order, most
+    significant bit first, so cell (x, y) is bit x * h + y. Clients decode
+    with atob + Uint8Array and test (byte[i >> 3] >> (7 - (i & 7))) & 1.
+    One bit per cell instead of ~5 JSON characters, with no Python loop.
+    """
+    arr = np.asarray(g.data, dtype=bool)
+    return {
+        'w': g.width,
+        'h': g.height,
+        'bits': base64.b64encode(np.packbits(arr)).decode()
+    }
+
+
+def _layout_walls_packed(lay):
+    """Bit-packed layout walls, cached on the layout like _layout_walls_list."""
+    walls = getattr(lay, '_wallsPacked', None)
+    if walls is None:
+        walls = lay._wallsPacked = _pack_grid(lay.walls)
+    return walls
+
+
 def serialize_game_state(state):
-    """Convert game state to JSON-serializable dict"""
+    """Convert a full Pacman game state to a JSON-serializable dict.
+
+    Pacman GameStates always carry these accessors, so attributes are read
+    directly rather than through per-field hasattr probes (each of which
+    is a getattr with exception handling under the hood); gridworld states
+    have their own serializer in serialize_gridworld_state. The food and
+    walls grids are bit-packed (see _pack_grid for the wire format) rather
+    than W*H nested boolean lists, cutting their share of the payload
+    roughly 30x.
+    """
     if state is None:
         return None
 
@@ -58,15 +141,86 @@ def serialize_game_state(state):
         data = state.data
         return {
             'score': state.getScore(),
-            'pacmanPosition': list(state.getPacmanPosition()) if hasattr(state, 'getPacmanPosition') else None,
-            'ghostPositions': [list(pos) for pos in state.getGhostPositions()] if hasattr(state, 'getGhostPositions') else [],
-            'food': [[data.food[x][y] for y in range(data.food.height)] for x in range(data.food.width)] if hasattr(data, 'food') else [],
-            'capsules': [list(c) for c in state.getCapsules()] if hasattr(state, 'getCapsules') else [],
+            'pacmanPosition': list(state.getPacmanPosition()),
+            'ghostPositions': [list(pos) for pos in state.getGhostPositions()],
+            'food': _pack_grid(data.food),
+            'capsules': [list(c) for c in state.getCapsules()],
             'isWin': state.isWin(),
             'isLose': state.isLose(),
-            'width': data.layout.width if hasattr(data, 'layout') else 0,
-            'height': data.layout.height if hasattr(data, 'layout') else 0,
-            'walls': [[data.layout.walls[x][y] for y in range(data.layout.height)] for x in range(data.layout.width)] if hasattr(data, 'layout') else []
+            'width': data.layout.width,
+            'height': data.layout.height,
+            'walls': _layout_walls_packed(data.layout)
+        }
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def _memoize_actions(gw):
+    """Wrap gw.getPossibleActions in a per-instance lru_cache.
+
+    Legal actions in a gridworld depend only on the cell, but the agents,
+    kernels and serializers all re-query them for the same states - in the
+    agent-based VI path once per state per iteration. The cached bound
+    method is installed as an instance attribute, so internal calls such
+    as getTransitionStatesAndProbs hit the cache too.
+    """
+    gw.getPossibleActions = functools.lru_cache(maxsize=None)(gw.getPossibleActions)
+    return gw
+
+
+def _wall_cells(gw):
+    """Wall cells of a Gridworld as {'x', 'y'} dicts.
+
+    The full-grid scan runs lazily once per instance and the list is
+    cached on it; walls never change after construction.
+    """
+    walls = getattr(gw, '_wall_cells', None)
+    if walls is None:
+        walls = gw._wall_cells = [{'x': x, 'y': y}
+                                  for x in range(gw.grid.width)
+                                  for y in range(gw.grid.height)
+                                  if gw.grid[x][y] == '#']
+    return walls
+
+
+def _gw_static(gw):
+    """Static facts about a Gridworld (non-terminal states, wall cells and
+    legal actions), computed once per instance and cached on it; the grid
+    never changes after construction, so repeat serializations of the same
+    gridworld reuse the dict."""
+    static = getattr(gw, '_static', None)
+    if static is None:
+        states = [s for s in gw.getStates() if s != gw.grid.terminalState]
+        static = gw._static = {
+            'states': states,
+            'walls': _wall_cells(gw),
+            'actions': {s: tuple(gw.getPossibleActions(s)) for s in states}
+        }
+    return static
+
+
+def serialize_game_state_delta(state):
+    """Serialize only the per-game fields of a Pacman state.
+
+    Walls, width and height are identical for every game on a layout and
+    belong in the response's layoutStatic block instead; food is encoded
+    as the [x, y] cells still containing a dot rather than a full W*H
+    boolean grid, which shrinks the per-game payload from O(W*H) to
+    O(dots + ghosts + capsules).
+    """
+    if state is None:
+        return None
+
+    try:
+        data = state.data
+        return {
+            'score': state.getScore(),
+            'pacmanPosition': list(state.getPacmanPosition()),
+            'ghostPositions': [list(pos) for pos in state.getGhostPositions()],
+            'food': np.argwhere(np.asarray(data.food.data, dtype=bool)).tolist(),
+            'capsules': [list(c) for c in state.getCapsules()],
+            'isWin': state.isWin(),
+            'isLose': state.isLose()
         }
     except Exception as e:
         return {'error': str(e)}
@@ -74,7 +228,7 @@ def serialize_game_state(state):
 
 def serialize_gridworld_state(gw, state, agent=None, values=None, q_values=None):
     """Convert gridworld state to JSON-serializable dict"""
-    states = gw.getStates()
+    static = _gw_static(gw)
     grid_data = {
         'width': gw.grid.width,
         'height': gw.grid.height,
@@ -85,17 +239,16 @@ def serialize_gridworld_state(gw, state, agent=None, values=None, q_values=None)
         'noise': gw.noise
     }
 
-    for s in states:
-        if s == gw.grid.terminalState:
-            continue
+    for s in static['states']:
         x, y = s
         cell = gw.grid[x][y]
+        actions = static['actions'][s]
         state_info = {
             'x': x,
             'y': y,
             'type': 'terminal' if isinstance(cell, (int, float)) else 'normal',
             'reward': cell if isinstance(cell, (int, float)) else gw.livingReward,
-            'actions': list(gw.getPossibleActions(s))
+            'actions': list(actions)
         }
 
         if values is not None and s in values:
@@ -103,22 +256,74 @@ def serialize_gridworld_state(gw, state, agent=None, values=None, q_values=None)
 
         if q_values is not None:
             state_info['qValues'] = {}
-            for action in gw.getPossibleActions(s):
+            for action in actions:
                 if (s, action) in q_values:
                     state_info['qValues'][action] = q_values[(s, action)]
 
         grid_data['states'].append(state_info)
 
-    # Add wall info
-    grid_data['walls'] = []
-    for x in range(gw.grid.width):
-        for y in range(gw.grid.height):
-            if gw.grid[x][y] == '#':
-                grid_data['walls'].append({'x': x, 'y': y})
+    # Add wall info (precomputed with the rest of the static grid facts)
+    grid_data['walls'] = static['walls']
 
     return grid_data
 
 
+def _err(e):
+    """Error payload for a 500 response.
+
+    traceback.format_exc walks and formats the whole stack, so only pay
+    for it (and leak internals) when the server runs in debug mode.
+    """
+    if app.debug:
+        return {'error': str(e), 'traceback': traceback.format_exc()}
+    return {'error': str(e)}
+
+
+def _dispatch_job(job_func):
+    """Run a training job inline, or on the worker pool when async=true.
+
+    Synchronous calls keep the original request/response contract. With
+    {"async": true} in the body the job is submitted to EXECUTOR and a
+    job id is returned immediately; poll /api/jobs/<id> for the result.
+    Jobs signal unknown grids/layouts by raising LookupError.
+    """
+    data = request.json or {}
+    if data.get('async'):
+        job_id = uuid.uuid4().hex
+        with session_lock:
+            training_sessions[job_id] = EXECUTOR.submit(job_func, data)
+        return jsonify({'jobId': job_id, 'status': 'running'}), 202
+
+    try:
+        return jsonify(job_func(data))
+    except LookupError as e:
+        return jsonify({'error': str(e)}), 404
+    except Exception as e:
+        return jsonify(_err(e)), 500
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Poll a background training job.
+
+    A finished job is evicted when its result (or error) is delivered, so
+    training_sessions does not pin completed results forever; each result
+    is therefore retrievable exactly once.
+    """
+    with session_lock:
+        future = training_sessions.get(job_id)
+        if future is not None and future.done():
+            del training_sessions[job_id]
+    if future is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    if not future.done():
+        return jsonify({'jobId': job_id, 'status': 'running'})
+    try:
+        return jsonify({'jobId': job_id, 'status': 'done', 'result': future.result()})
+    except Exception as e:
+        return jsonify({'jobId': job_id, 'status': 'error', 'error': str(e)})
+
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -150,28 +355,37 @@ def list_agents():
     })
 
 
+@functools.lru_cache(maxsize=64)
+def _serialize_layout_json(layout_name):
+    """Encode layout details to orjson bytes once; layouts are static files.
+
+    walls and food use the bit-packed format described on _pack_grid.
+    Raises KeyError for unknown layouts so misses are not cached.
+    """
+    lay = layout.getLayout(layout_name)
+    if lay is None:
+        raise KeyError(layout_name)
+
+    return orjson.dumps({
+        'name': layout_name,
+        'width': lay.width,
+        'height': lay.height,
+        'walls': _layout_walls_packed(lay),
+        'food': _pack_grid(lay.food),
+        'capsules': [list(c) for c in lay.capsules],
+        'numGhosts': lay.numGhosts,
+        'pacmanStart': list(lay.agentPositions[0][1]) if lay.agentPositions else None,
+        'ghostStarts': [list(pos[1]) for pos in lay.agentPositions[1:]] if len(lay.agentPositions) > 1 else []
+    })
+
+
 @app.route('/api/layout/<layout_name>', methods=['GET'])
 def get_layout(layout_name):
     """Get layout details"""
     try:
-        lay = layout.getLayout(layout_name)
-        if lay is None:
-            return jsonify({'error': f'Layout {layout_name} not found'}), 404
-
-        walls = [[lay.walls[x][y] for y in range(lay.height)] for x in range(lay.width)]
-        food = [[lay.food[x][y] for y in range(lay.height)] for x in range(lay.width)]
-
-        return jsonify({
-            'name': layout_name,
-            'width': lay.width,
-            'height': lay.height,
-            'walls': walls,
-            'food': food,
-            'capsules': [list(c) for c in lay.capsules],
-            'numGhosts': lay.numGhosts,
-            'pacmanStart': list(lay.agentPositions[0][1]) if lay.agentPositions else None,
-            'ghostStarts': [list(pos[1]) for pos in lay.agentPositions[1:]] if len(lay.agentPositions) > 1 else []
-        })
+        return Response(_serialize_layout_json(layout_name), mimetype='application/json')
+    except KeyError:
+        return jsonify({'error': f'Layout {layout_name} not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -192,27 +406,40 @@ def run_value_iteration():
         if grid_func is None:
             return jsonify({'error': f'Grid {grid_name} not found'}), 404
 
-        gw = grid_func()
+        gw = _memoize_actions(grid_func())
         gw.setNoise(noise)
         gw.setLivingReward(living_reward)
 
-        # Run value iteration
-        agent = ValueIterationAgent(gw, discount=discount, iterations=iterations)
-
-        # Collect values and policy
-        values = {}
-        policy = {}
-        q_values = {}
-
-        for state in gw.getStates():
-            if state != gw.grid.terminalState:
-                values[state] = agent.getValue(state)
-                best_action = agent.getAction(state)
-                if best_action:
-                    policy[str(state)] = best_action
-
-                for action in gw.getPossibleActions(state):
-                    q_values[(state, action)] = agent.getQValue(state, action)
+        # Run value iteration. The vectorized NumPy kernel is the default;
+        # useAgent=true falls back to the reference ValueIterationAgent.
+        if data.get('useAgent'):
+            agent = ValueIterationAgent(gw, discount=discount, iterations=iterations)
+
+            # Collect values and policy; the "(x, y)" JSON keys are built
+            # inline here so no str(k) rebuild pass is needed afterwards
+            values = {}
+            values_json = {}
+            policy = {}
+            q_values = {}
+
+            for state in gw.getStates():
+                if state != gw.grid.terminalState:
+                    # Each getQValue walks the transition model, and
+                    # getAction recomputes every Q internally, so compute
+                    # the per-action Q-values once and derive the policy
+                    # from them; getValue is a plain table lookup.
+                    key = fast_mdp.state_key(state)
+                    values[state] = values_json[key] = agent.getValue(state)
+                    qs = {a: agent.getQValue(state, a)
+                          for a in gw.getPossibleActions(state)}
+                    if qs:
+                        policy[key] = max(qs, key=qs.get)
+                        for action, q in qs.items():
+                            q_values[(state, action)] = q
+        else:
+            solution = fast_mdp.solve_gridworld(gw, discount, iterations)
+            values, q_values = solution.values, solution.q_values
+            values_json, policy = solution.values_json, solution.policy_json
 
         # Serialize results
         result = {
@@ -221,21 +448,71 @@ def run_value_iteration():
             'discount': discount,
             'noise': noise,
             'livingReward': living_reward,
-            'gridData': serialize_gridworld_state(gw, None, agent, values, q_values),
-            'values': {str(k): v for k, v in values.items()},
+            'gridData': serialize_gridworld_state(gw, None, values=values, q_values=q_values),
+            'values': values_json,
             'policy': policy
         }
 
         return jsonify(result)
     except Exception as e:
-        import traceback
-        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+        return jsonify(_err(e)), 500
+
+
+def _vi_batch_job(data):
+    """Solve a batch of value-iteration configurations in one request.
+
+    Configurations sharing (grid, iterations, noise, livingReward) differ
+    only by discount, so each such group is solved in one broadcast sweep
+    over a shared transition tensor (fast_mdp.solve_gridworld_batch).
+    Results align with the input list; unknown grids produce a per-entry
+    error rather than failing the whole batch.
+    """
+    param_sets = data.get('requests') or []
+    responses = [None] * len(param_sets)
+
+    groups = {}
+    for idx, params in enumerate(param_sets):
+        key = (params.get('grid', 'BookGrid'),
+               params.get('iterations', 100),
+               params.get('noise', 0.2),
+               params.get('livingReward', 0.0))
+        groups.setdefault(key, []).append((idx, params.get('discount', 0.9)))
+
+    for (grid_name, iterations, noise, living_reward), members in groups.items():
+        grid_func = getattr(gridworld, f'get{grid_name}', None)
+        if grid_func is None:
+            for idx, _ in members:
+                responses[idx] = {'error': f'Grid {grid_name} not found'}
+            continue
 
+        gw = _memoize_actions(grid_func())
+        gw.setNoise(noise)
+        gw.setLivingReward(living_reward)
 
-@app.route('/api/qlearning/start', methods=['POST'])
-def start_qlearning():
-    """Start a Q-learning training session"""
-    data = request.json or {}
+        solutions = fast_mdp.solve_gridworld_batch(
+            gw, [discount for _, discount in members], iterations)
+        for (idx, discount), solution in zip(members, solutions):
+            responses[idx] = {
+                'grid': grid_name,
+                'iterations': iterations,
+                'discount': discount,
+                'noise': noise,
+                'livingReward': living_reward,
+                'values': solution.values_json,
+                'policy': solution.policy_json
+            }
+
+    return {'results': responses}
+
+
+@app.route('/api/value-iteration/batch', methods=['POST'])
+def run_value_iteration_batch():
+    """Run value iteration for a list of parameter sets in one request"""
+    return _dispatch_job(_vi_batch_job)
+
+
+def _qlearning_job(data):
+    """Train a Q-learning agent on a gridworld; returns the response dict"""
     grid_name = data.get('grid', 'BookGrid')
     episodes = data.get('episodes', 100)
     epsilon = data.get('epsilon', 0.3)
@@ -244,100 +521,56 @@ def start_qlearning():
     noise = data.get('noise', 0.2)
     living_reward = data.get('livingReward', 0.0)
 
-    try:
-        # Get the grid
-        grid_func = getattr(gridworld, f'get{grid_name}', None)
-        if grid_func is None:
-            return jsonify({'error': f'Grid {grid_name} not found'}), 404
+    # Get the grid
+    grid_func = getattr(gridworld, f'get{grid_name}', None)
+    if grid_func is None:
+        raise LookupError(f'Grid {grid_name} not found')
+
+    gw = _memoize_actions(grid_func())
+    gw.setNoise(noise)
+    gw.setLivingReward(living_reward)
+
+    # Run training through the JIT-compiled kernel: the MDP is
+    # enumerated into dense arrays once and every episode's
+    # act/sample/update step runs inside fast_mdp._qlearn_kernel
+    # instead of the Python-level agent/environment loop.
+    tensors, Q, ep_rewards, ep_steps = fast_mdp.train_qlearning(
+        gw, episodes, alpha, discount, epsilon)
+
+    # Store every 5% of episodes for the training history
+    results = []
+    for episode in range(0, episodes, max(1, episodes // 20)):
+        results.append({
+            'episode': episode,
+            'totalReward': ep_rewards[episode],
+            'steps': int(ep_steps[episode])
+        })
 
-        gw = grid_func()
-        gw.setNoise(noise)
-        gw.setLivingReward(living_reward)
+    # Get final Q-values and policy
+    solution = fast_mdp.q_table_to_dicts(tensors, Q)
 
-        # Create environment
-        env = gridworld.GridworldEnvironment(gw)
+    return {
+        'grid': grid_name,
+        'episodes': episodes,
+        'epsilon': epsilon,
+        'alpha': alpha,
+        'discount': discount,
+        'trainingHistory': results,
+        'gridData': serialize_gridworld_state(
+            gw, None, values=solution.values, q_values=solution.q_values),
+        'values': solution.values_json,
+        'policy': solution.policy_json
+    }
 
-        # Create Q-learning agent
-        agent = QLearningAgent(
-            actionFn=lambda state: gw.getPossibleActions(state),
-            epsilon=epsilon,
-            alpha=alpha,
-            gamma=discount
-        )
 
-        # Run training
-        results = []
-        for episode in range(episodes):
-            state = env.getCurrentState()
-            total_reward = 0
-            steps = 0
-
-            while True:
-                actions = gw.getPossibleActions(state)
-                if not actions:
-                    break
-
-                action = agent.getAction(state)
-                if action is None:
-                    break
-
-                next_state, reward = env.doAction(action)
-                agent.update(state, action, next_state, reward)
-
-                total_reward += reward
-                steps += 1
-                state = next_state
-
-                if state == gw.grid.terminalState or steps > 100:
-                    break
-
-            agent.stopEpisode()
-            env.reset()
-
-            # Store episode result
-            if episode % max(1, episodes // 20) == 0:  # Store every 5% of episodes
-                results.append({
-                    'episode': episode,
-                    'totalReward': total_reward,
-                    'steps': steps
-                })
-
-        # Get final Q-values and policy
-        q_values = {}
-        values = {}
-        policy = {}
-
-        for state in gw.getStates():
-            if state != gw.grid.terminalState:
-                actions = gw.getPossibleActions(state)
-                if actions:
-                    q_vals = [agent.getQValue(state, a) for a in actions]
-                    values[state] = max(q_vals) if q_vals else 0
-                    policy[str(state)] = agent.getPolicy(state)
-
-                    for action in actions:
-                        q_values[(state, action)] = agent.getQValue(state, action)
-
-        return jsonify({
-            'grid': grid_name,
-            'episodes': episodes,
-            'epsilon': epsilon,
-            'alpha': alpha,
-            'discount': discount,
-            'trainingHistory': results,
-            'gridData': serialize_gridworld_state(gw, None, agent, values, q_values),
-            'values': {str(k): v for k, v in values.items()},
-            'policy': policy
-        })
-    except Exception as e:
-        import traceback
-        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+@app.route('/api/qlearning/start', methods=['POST'])
+def start_qlearning():
+    """Start a Q-learning training session"""
+    return _dispatch_job(_qlearning_job)
 
 
-@app.route('/api/pacman/run', methods=['POST'])
-def run_pacman_game():
-    """Run a Pacman game with specified agent"""
-    data = request.json or {}
+def _run_pacman_games(data):
+    """Run the requested Pacman games; returns (params, test_games)"""
     layout_name = data.get('layout', 'smallGrid')
     agent_type = data.get('agent', 'PacmanQAgent')
     num_training = data.get('numTraining', 10)
@@ -346,82 +579,137 @@ def run_pacman_game():
     alpha = data.get('alpha', 0.2)
     discount = data.get('discount', 0.8)
 
-    try:
-        lay = layout.getLayout(layout_name)
-        if lay is None:
-            return jsonify({'error': f'Layout {layout_name} not found'}), 404
-
-        # Create appropriate agent
-        if agent_type == 'PacmanQAgent':
-            agent = PacmanQAgent(
-                epsilon=epsilon,
-                alpha=alpha,
-                gamma=discount,
-                numTraining=num_training
-            )
-        elif agent_type == 'ApproximateQAgent':
-            agent = ApproximateQAgent(
-                extractor='SimpleExtractor',
-                epsilon=epsilon,
-                alpha=alpha,
-                gamma=discount,
-                numTraining=num_training
-            )
-        else:
-            # Random agent
-            from pacmanAgents import RandomAgent
-            agent = RandomAgent()
-
-        # Run games
-        ghosts = [ghostAgents.RandomGhost(i + 1) for i in range(lay.numGhosts)]
-        display = textDisplay.NullGraphics()
-
-        games = pacman.runGames(
-            lay,
-            agent,
-            ghosts,
-            display,
-            numGames=num_training + num_games,
-            record=False,
-            numTraining=num_training,
-            catchExceptions=True,
-            timeout=30
-        )
+    lay = layout.getLayout(layout_name)
+    if lay is None:
+        raise LookupError(f'Layout {layout_name} not found')
 
-        # Collect results
-        test_games = games[num_training:] if len(games) > num_training else games
-        results = {
-            'layout': layout_name,
-            'agent': agent_type,
-            'numTraining': num_training,
-            'numGames': num_games,
-            'games': [],
-            'summary': {
-                'wins': sum(1 for g in test_games if g.state.isWin()),
-                'losses': sum(1 for g in test_games if g.state.isLose()),
-                'avgScore': sum(g.state.getScore() for g in test_games) / len(test_games) if test_games else 0
-            }
+    # Create appropriate agent
+    if agent_type == 'PacmanQAgent':
+        agent = PacmanQAgent(
+            epsilon=epsilon,
+            alpha=alpha,
+            gamma=discount,
+            numTraining=num_training
+        )
+    elif agent_type == 'ApproximateQAgent':
+        agent = ApproximateQAgent(
+            extractor='SimpleExtractor',
+            epsilon=epsilon,
+            alpha=alpha,
+            gamma=discount,
+            numTraining=num_training
+        )
+    else:
+        # Random agent
+        from pacmanAgents import RandomAgent
+        agent = RandomAgent()
+
+    # Run games
+    ghosts = [ghostAgents.RandomGhost(i + 1) for i in range(lay.numGhosts)]
+    display = textDisplay.NullGraphics()
+
+    # catchExceptions must stay off: it wraps every agent call in
+    # util.TimeoutFunction, whose signal.SIGALRM handler raises ValueError
+    # on any non-main thread (EXECUTOR jobs, threaded WSGI workers), which
+    # game.run then swallows as an instant "agent crash" and reports as a
+    # normal loss - silently wrong results instead of an error.
+    games = pacman.runGames(
+        lay,
+        -1,  # horizon: no per-game timestep limit
+        agent,
+        ghosts,
+        display,
+        numGames=num_training + num_games,
+        record=False,
+        numTraining=num_training,
+        catchExceptions=False,
+        timeout=30
+    )
+
+    test_games = games[num_training:] if len(games) > num_training else games
+    params = {
+        'layout': layout_name,
+        'agent': agent_type,
+        'numTraining': num_training,
+        'numGames': num_games,
+        # Shared by every game on this layout; per-game entries only
+        # carry the fields that differ (see serialize_game_state_delta).
+        'layoutStatic': {
+            'walls': _layout_walls_list(lay),
+            'width': lay.width,
+            'height': lay.height
         }
+    }
+    return params, test_games
 
-        for i, g in enumerate(test_games):
-            results['games'].append({
-                'gameIndex': i,
-                'score': g.state.getScore(),
-                'isWin': g.state.isWin(),
-                'isLose': g.state.isLose(),
-                'finalState': serialize_game_state(g.state)
-            })
 
-        return jsonify(results)
-    except Exception as e:
-        import traceback
-        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+def _pacman_summary(test_games):
+    """Aggregate win/loss/score statistics over the test games"""
+    return {
+        'wins': sum(1 for g in test_games if g.state.isWin()),
+        'losses': sum(1 for g in test_games if g.state.isLose()),
+        'avgScore': sum(g.state.getScore() for g in test_games) / len(test_games) if test_games else 0
+    }
 
 
-@app.route('/api/algorithms', methods=['GET'])
-def get_algorithms():
-    """Get detailed info about available RL algorithms"""
-    return jsonify({
+def _serialize_pacman_game(index, g):
+    """Per-game entry of the /api/pacman/run response"""
+    return {
+        'gameIndex': index,
+        'score': g.state.getScore(),
+        'isWin': g.state.isWin(),
+        'isLose': g.state.isLose(),
+        'finalState': serialize_game_state_delta(g.state)
+    }
+
+
+def _pacman_job(data):
+    """Run Pacman games with the specified agent; returns the response dict"""
+    params, test_games = _run_pacman_games(data)
+    results = dict(params)
+    results['games'] = [_serialize_pacman_game(i, g) for i, g in enumerate(test_games)]
+    results['summary'] = _pacman_summary(test_games)
+    return results
+
+
+def _stream_pacman_results(params, test_games):
+    """NDJSON generator: one summary line, then one line per test game.
+
+    The summary line carries the shared layoutStatic block; per-game lines
+    hold only the delta fields (see serialize_game_state_delta - no walls,
+    food as dot coordinates), each serialized just before its line is
+    yielded, so peak memory is bounded by a single game's payload and
+    transmission starts before serialization finishes.
+    """
+    summary = dict(params)
+    summary['summary'] = _pacman_summary(test_games)
+    yield orjson.dumps(summary) + b'\n'
+    for i, g in enumerate(test_games):
+        yield orjson.dumps(_serialize_pacman_game(i, g)) + b'\n'
+
+
+@app.route('/api/pacman/run', methods=['POST'])
+def run_pacman_game():
+    """Run a Pacman game with specified agent.
+
+    With {"stream": true} the response is application/x-ndjson: a summary
+    line followed by one orjson-encoded line per game, emitted as they
+    serialize. The default remains a single JSON document.
+    """
+    data = request.json or {}
+    if data.get('stream') and not data.get('async'):
+        try:
+            params, test_games = _run_pacman_games(data)
+        except LookupError as e:
+            return jsonify({'error': str(e)}), 404
+        return Response(_stream_pacman_results(params, test_games),
+                        mimetype='application/x-ndjson')
+    return _dispatch_job(_pacman_job)
+
+
+# Algorithm catalog is fully static, so it is encoded to JSON bytes once at
+# import time and each request just returns the cached buffer.
+ALGORITHM_INFO = {
         'algorithms': [
             {
                 'id': 'value_iteration',
@@ -464,93 +752,86 @@ def get_algorithms():
                 'equation': 'Q(s,a;θ) via neural network with experience replay and target networks'
             }
         ]
-    })
+    }
+_ALGORITHMS_JSON = orjson.dumps(ALGORITHM_INFO)
 
 
-@app.route('/api/demo/compare', methods=['POST'])
-def compare_algorithms():
-    """Compare multiple algorithms on the same problem"""
-    data = request.json or {}
+@app.route('/api/algorithms', methods=['GET'])
+def get_algorithms():
+    """Get detailed info about available RL algorithms"""
+    return Response(_ALGORITHMS_JSON, mimetype='application/json')
+
+
+def _compare_vi(grid_name, iterations):
+    """Value Iteration half of /api/demo/compare (top-level so it pickles)"""
+    gw = _memoize_actions(getattr(gridworld, f'get{grid_name}')())
+    solution = fast_mdp.solve_gridworld(gw, 0.9, iterations)
+    return {
+        'algorithm': 'Value Iteration',
+        'iterations': iterations,
+        'values': solution.values_json,
+        'policy': solution.policy_json
+    }
+
+
+def _compare_ql(grid_name, episodes):
+    """Q-Learning half of /api/demo/compare (top-level so it pickles)"""
+    gw = _memoize_actions(getattr(gridworld, f'get{grid_name}')())
+    tensors, Q, _, _ = fast_mdp.train_qlearning(
+        gw, episodes, alpha=0.5, gamma=0.9, epsilon=0.3)
+    solution = fast_mdp.q_table_to_dicts(tensors, Q)
+    return {
+        'algorithm': 'Q-Learning',
+        'episodes': episodes,
+        'values': solution.values_json,
+        'policy': solution.policy_json
+    }
+
+
+def _compare_job(data):
+    """Compare Value Iteration and Q-Learning on the same grid"""
     grid_name = data.get('grid', 'BookGrid')
     iterations = data.get('iterations', 100)
     episodes = data.get('episodes', 100)
 
-    results = {
+    if getattr(gridworld, f'get{grid_name}', None) is None:
+        raise LookupError(f'Grid {grid_name} not found')
+
+    # The two solves are independent rollouts, so dispatch them to a
+    # forked process pool and sidestep the GIL; each worker rebuilds the
+    # grid from its name, which is all that needs to cross the fork.
+    # Platforms without fork (spawn would re-import the app) run inline.
+    if 'fork' in multiprocessing.get_all_start_methods():
+        ctx = multiprocessing.get_context('fork')
+        with ctx.Pool(2) as pool:
+            vi_result = pool.apply_async(_compare_vi, (grid_name, iterations))
+            ql_result = pool.apply_async(_compare_ql, (grid_name, episodes))
+            comparisons = [vi_result.get(), ql_result.get()]
+    else:
+        comparisons = [_compare_vi(grid_name, iterations),
+                       _compare_ql(grid_name, episodes)]
+
+    return {
         'grid': grid_name,
-        'comparisons': []
+        'comparisons': comparisons
     }
 
-    try:
-        # Get the grid
-        grid_func = getattr(gridworld, f'get{grid_name}', None)
-        if grid_func is None:
-            return jsonify({'error': f'Grid {grid_name} not found'}), 404
-
-        gw = grid_func()
-
-        # Run Value Iteration
-        vi_agent = ValueIterationAgent(gw, discount=0.9, iterations=iterations)
-        vi_values = {}
-        vi_policy = {}
-        for state in gw.getStates():
-            if state != gw.grid.terminalState:
-                vi_values[str(state)] = vi_agent.getValue(state)
-                action = vi_agent.getAction(state)
-                if action:
-                    vi_policy[str(state)] = action
-
-        results['comparisons'].append({
-            'algorithm': 'Value Iteration',
-            'iterations': iterations,
-            'values': vi_values,
-            'policy': vi_policy
-        })
 
-        # Run Q-Learning
-        env = gridworld.GridworldEnvironment(gw)
-        ql_agent = QLearningAgent(
-            actionFn=lambda state: gw.getPossibleActions(state),
-            epsilon=0.3,
-            alpha=0.5,
-            gamma=0.9
-        )
-
-        for _ in range(episodes):
-            state = env.getCurrentState()
-            while state != gw.grid.terminalState:
-                action = ql_agent.getAction(state)
-                if action is None:
-                    break
-                next_state, reward = env.doAction(action)
-                ql_agent.update(state, action, next_state, reward)
-                state = next_state
-            ql_agent.stopEpisode()
-            env.reset()
-
-        ql_values = {}
-        ql_policy = {}
-        for state in gw.getStates():
-            if state != gw.grid.terminalState:
-                actions = gw.getPossibleActions(state)
-                if actions:
-                    q_vals = [ql_agent.getQValue(state, a) for a in actions]
-                    ql_values[str(state)] = max(q_vals) if q_vals else 0
-                    ql_policy[str(state)] = ql_agent.getPolicy(state)
-
-        results['comparisons'].append({
-            'algorithm': 'Q-Learning',
-            'episodes': episodes,
-            'values': ql_values,
-            'policy': ql_policy
-        })
-
-        return jsonify(results)
-    except Exception as e:
-        import traceback
-        return jsonify({'error': str(e), 'traceback': traceback.format_exc()}), 500
+@app.route('/api/demo/compare', methods=['POST'])
+def compare_algorithms():
+    """Compare multiple algorithms on the same problem"""
+    return _dispatch_job(_compare_job)
 
 
 if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='AI-Pacman API Server')
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5000)
+    parser.add_argument('--dev', action='store_true',
+                        help='run the Flask dev server with debug and the reloader')
+    args = parser.parse_args()
+
     print("Starting AI-Pacman API Server...")
     print("Available endpoints:")
     print("  GET  /api/health - Health check")
@@ -558,9 +839,14 @@ if __name__ == '__main__':
     print("  GET  /api/agents - List available agents")
     print("  GET  /api/layout/<name> - Get layout details")
     print("  GET  /api/algorithms - Get algorithm details")
+    print("  GET  /api/jobs/<id> - Poll a background job")
     print("  POST /api/value-iteration - Run value iteration")
     print("  POST /api/qlearning/start - Run Q-learning training")
     print("  POST /api/pacman/run - Run Pacman game")
     print("  POST /api/demo/compare - Compare algorithms")
     print()
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    if not args.dev:
+        print("For production use a threaded WSGI server (one worker - see wsgi.py):")
+        print("  gunicorn -w 1 -k gthread --threads 8 wsgi:app")
+        print()
+    app.run(host=args.host, port=args.port, debug=args.dev)
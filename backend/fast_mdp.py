@@ -0,0 +1,254 @@
+"""
+NumPy-vectorized solvers for the discrete gridworld MDPs served by the API.
+
+The gridworlds exposed over HTTP are small (tens to hundreds of states), so
+the dominant cost of ValueIterationAgent is Python bytecode dispatch: every
+Bellman backup walks getTransitionStatesAndProbs and getReward per state and
+action. Here the MDP is enumerated once into dense transition/reward tensors
+and the Bellman sweeps run as whole-array NumPy operations.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # Without numba the kernels still run correctly as plain Python over
+    # NumPy arrays, just without the JIT speedup.
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+# Dense tensor form of a gridworld MDP:
+#   states  - list of state tuples, indexed by row of the arrays below
+#   actions - tuple of legal actions per state, indexed to the action axis
+#   T       - transition probabilities, shape (n_states, max_actions, n_states)
+#   R       - expected one-step reward, shape (n_states, max_actions)
+#   mask    - True where the action slot is a legal action for the state
+MDPTensors = namedtuple('MDPTensors', ['states', 'actions', 'T', 'R', 'mask'])
+
+# A solved MDP in the forms the API consumes: values/q_values/policy are
+# keyed by state tuples (for the gridData serializer), values_json and
+# policy_json by the "(x, y)" strings used as JSON keys on the wire.
+GridworldSolution = namedtuple(
+    'GridworldSolution',
+    ['values', 'q_values', 'policy', 'values_json', 'policy_json'])
+
+
+def state_key(s):
+    """The JSON key for a state tuple, e.g. (2, 3) -> '(2, 3)'."""
+    return f'({s[0]}, {s[1]})'
+
+
+def build_mdp(gw):
+    """
+    Enumerate a Gridworld into dense MDPTensors.
+
+    States are indexed in gw.getStates() order (the terminal state keeps a
+    row with no legal actions, so its value stays 0 through every sweep).
+    """
+    states = gw.getStates()
+    index = {s: i for i, s in enumerate(states)}
+    actions = [tuple(gw.getPossibleActions(s)) for s in states]
+
+    n = len(states)
+    max_actions = max(len(a) for a in actions)
+    T = np.zeros((n, max_actions, n))
+    R = np.zeros((n, max_actions))
+    mask = np.zeros((n, max_actions), dtype=bool)
+
+    for i, s in enumerate(states):
+        for j, a in enumerate(actions[i]):
+            mask[i, j] = True
+            for next_state, prob in gw.getTransitionStatesAndProbs(s, a):
+                T[i, j, index[next_state]] += prob
+                R[i, j] += prob * gw.getReward(s, a, next_state)
+
+    return MDPTensors(states, actions, T, R, mask)
+
+
+def value_iteration_np(T, R, mask, discount, iterations):
+    """
+    Run `iterations` synchronous Bellman sweeps and return (V, Q).
+
+    Each sweep is Q = R + discount * T @ V followed by a masked max over
+    the action axis; states with no legal actions keep value 0, matching
+    ValueIterationAgent's treatment of the terminal state. Q is computed
+    from the final V, as the agent does when queried after training.
+    """
+    n = T.shape[0]
+    V = np.zeros(n)
+    has_actions = mask.any(axis=1)
+
+    for _ in range(iterations):
+        Q = R + discount * (T @ V)
+        V = np.where(mask, Q, -np.inf).max(axis=1)
+        V[~has_actions] = 0.0
+
+    Q = R + discount * (T @ V)
+    return V, Q
+
+
+@njit(cache=True)
+def _qlearn_kernel(Q, T_cum, n_actions, state_rewards, start, episodes,
+                   max_steps, alpha, gamma, epsilon, seed):
+    """
+    Tabular Q-learning over the dense MDP arrays, compiled with numba.
+
+    Q is updated in place; per-episode total reward and step counts are
+    returned for the training history. T_cum holds cumulative transition
+    probabilities so next states sample with a single random draw, and
+    rewards depend only on the departed state (as in Gridworld.getReward).
+    """
+    np.random.seed(seed)
+    n_states = Q.shape[0]
+    ep_rewards = np.zeros(episodes)
+    ep_steps = np.zeros(episodes, dtype=np.int64)
+
+    for ep in range(episodes):
+        s = start
+        total = 0.0
+        steps = 0
+        while n_actions[s] > 0 and steps < max_steps:
+            # epsilon-greedy action choice over the legal action slots
+            na = n_actions[s]
+            if np.random.random() < epsilon:
+                a = int(np.random.random() * na)
+            else:
+                a = 0
+                for j in range(1, na):
+                    if Q[s, j] > Q[s, a]:
+                        a = j
+
+            # sample the next state from the cumulative distribution
+            draw = np.random.random()
+            ns = n_states - 1
+            for k in range(n_states):
+                if draw < T_cum[s, a, k]:
+                    ns = k
+                    break
+
+            reward = state_rewards[s]
+            best_next = 0.0
+            if n_actions[ns] > 0:
+                best_next = Q[ns, 0]
+                for j in range(1, n_actions[ns]):
+                    if Q[ns, j] > best_next:
+                        best_next = Q[ns, j]
+
+            Q[s, a] = (1.0 - alpha) * Q[s, a] + alpha * (reward + gamma * best_next)
+            total += reward
+            steps += 1
+            s = ns
+
+        ep_rewards[ep] = total
+        ep_steps[ep] = steps
+
+    return ep_rewards, ep_steps
+
+
+def train_qlearning(gw, episodes, alpha, gamma, epsilon, max_steps=100, seed=None):
+    """
+    Train tabular Q-learning on a Gridworld with the JIT-compiled kernel.
+
+    Returns (tensors, Q, ep_rewards, ep_steps): the MDPTensors used, the
+    final dense Q table, and per-episode reward/step histories.
+    """
+    tensors = build_mdp(gw)
+    T_cum = np.cumsum(tensors.T, axis=2)
+    n_actions = np.array([len(a) for a in tensors.actions], dtype=np.int64)
+    state_rewards = np.array([gw.getReward(s, None, None) for s in tensors.states])
+    start = tensors.states.index(gw.getStartState())
+    if seed is None:
+        seed = np.random.randint(2 ** 31 - 1)
+
+    Q = np.zeros(tensors.R.shape)
+    ep_rewards, ep_steps = _qlearn_kernel(
+        Q, T_cum, n_actions, state_rewards, start, episodes,
+        max_steps, alpha, gamma, epsilon, seed)
+    return tensors, Q, ep_rewards, ep_steps
+
+
+def q_table_to_dicts(tensors, Q):
+    """
+    Translate a dense Q table back to a GridworldSolution, terminal state
+    omitted. Values are the max over legal actions, matching
+    QLearningAgent.getValue; the JSON-keyed dicts are filled in the same
+    pass so callers never rebuild them with a str(k) comprehension.
+    """
+    return _extract_solution(tensors, Q, None)
+
+
+def _extract_solution(tensors, Q, V):
+    """Shared extraction loop: V supplies state values when given (value
+    iteration), otherwise the max legal Q is used (Q-learning)."""
+    values = {}
+    q_values = {}
+    policy = {}
+    values_json = {}
+    policy_json = {}
+    for i, s in enumerate(tensors.states):
+        state_actions = tensors.actions[i]
+        if not state_actions:
+            continue
+        best_j = 0
+        for j, a in enumerate(state_actions):
+            q_values[(s, a)] = Q[i, j]
+            if Q[i, j] > Q[i, best_j]:
+                best_j = j
+        key = state_key(s)
+        value = V[i] if V is not None else Q[i, best_j]
+        values[s] = value
+        values_json[key] = value
+        policy[s] = state_actions[best_j]
+        policy_json[key] = state_actions[best_j]
+    return GridworldSolution(values, q_values, policy, values_json, policy_json)
+
+
+def run_vi_batch(T, R, mask, discounts, iterations):
+    """
+    Value-iterate one MDP under several discount factors at once.
+
+    V has shape (batch, n_states) and each sweep applies the shared
+    transition tensor to every configuration through a single einsum, so
+    the batch reuses T from cache instead of re-walking it per discount.
+    Returns (V, Q) with Q of shape (batch, n_states, max_actions),
+    computed from the final V as in value_iteration_np.
+    """
+    gammas = np.asarray(discounts, dtype=float)[:, None, None]
+    V = np.zeros((len(discounts), T.shape[0]))
+    has_actions = mask.any(axis=1)
+
+    for _ in range(iterations):
+        Q = R[None] + gammas * np.einsum('san,bn->bsa', T, V)
+        V = np.where(mask[None], Q, -np.inf).max(axis=2)
+        V[:, ~has_actions] = 0.0
+
+    Q = R[None] + gammas * np.einsum('san,bn->bsa', T, V)
+    return V, Q
+
+
+def solve_gridworld_batch(gw, discounts, iterations):
+    """
+    Solve one Gridworld for a list of discount factors in a single
+    batched sweep; returns a GridworldSolution per discount, in order.
+    """
+    tensors = build_mdp(gw)
+    V, Q = run_vi_batch(tensors.T, tensors.R, tensors.mask, discounts, iterations)
+    return [_extract_solution(tensors, Q[b], V[b]) for b in range(len(discounts))]
+
+
+def solve_gridworld(gw, discount, iterations):
+    """
+    Solve a Gridworld with the vectorized kernel and return a
+    GridworldSolution: values maps state -> V(s), q_values maps
+    (state, action) -> Q(s, a), policy maps state to the argmax action,
+    and values_json/policy_json carry the same data under "(x, y)" string
+    keys. The terminal state is omitted, as in the agent-based loops.
+    """
+    tensors = build_mdp(gw)
+    V, Q = value_iteration_np(tensors.T, tensors.R, tensors.mask, discount, iterations)
+    return _extract_solution(tensors, Q, V)
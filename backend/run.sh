@@ -26,7 +26,8 @@ print_usage() {
     echo -e "${YELLOW}Usage:${NC} ./run.sh [command]"
     echo
     echo -e "${GREEN}Commands:${NC}"
-    echo "  api          Start the Flask API server (default)"
+    echo "  api          Start the API server under gunicorn (default)"
+    echo "  dev          Start the Flask dev server (debug + reloader)"
     echo "  pacman       Run Pacman game directly"
     echo "  gridworld    Run Gridworld demo"
     echo "  test         Run autograder tests"
@@ -64,7 +65,22 @@ run_api() {
     echo -e "${GREEN}Starting API server on http://localhost:5000${NC}"
     echo -e "${YELLOW}Press Ctrl+C to stop${NC}"
     echo
-    $PYTHON api.py
+    if command -v gunicorn &> /dev/null; then
+        # Single worker on purpose: the async job store lives in process
+        # memory, so extra workers would 404 on polls for live jobs (see
+        # wsgi.py); threads carry the concurrency instead.
+        gunicorn -w 1 -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:app
+    else
+        echo -e "${YELLOW}gunicorn not found, falling back to the dev server${NC}"
+        $PYTHON api.py
+    fi
+}
+
+run_dev() {
+    echo -e "${GREEN}Starting Flask dev server on http://localhost:5000${NC}"
+    echo -e "${YELLOW}Press Ctrl+C to stop${NC}"
+    echo
+    $PYTHON api.py --dev
 }
 
 run_pacman() {
@@ -92,6 +108,9 @@ case "${1:-api}" in
     api)
         run_api
         ;;
+    dev)
+        run_dev
+        ;;
     pacman)
         run_pacman "$@"
         ;;
@@ -0,0 +1,18 @@
+"""
+WSGI entry point for the AI-Pacman API.
+
+Run under a production server so training jobs execute in parallel instead
+of funneling through the single-threaded Flask dev server. Keep it to ONE
+worker process: the async job store (training_sessions) is per-process
+in-memory state, so with multiple workers a /api/jobs/<id> poll would land
+on a worker that never saw the submit and 404 for a live job. Threads
+provide the request concurrency instead, e.g.:
+
+    gunicorn -w 1 -k gthread --threads 8 wsgi:app
+
+The dev server remains available via `python api.py --dev`.
+"""
+
+from api import app
+
+__all__ = ['app']